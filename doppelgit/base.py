@@ -1,7 +1,14 @@
 import os
+import shutil
+import sys
 from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from . import data, diff
 
+# Number of worker threads used to hash and check out files, overridden by ``--jobs``
+JOBS = os.cpu_count()
+
 
 def init():
     """Initialize a new doppelgit repository."""
@@ -14,34 +21,48 @@ def write_tree(directory="."):
     Write a tree object for the current directory.
 
     This function recursively writes a tree object for the specified directory and
-    returns the object ID of the tree.
+    returns the object ID of the tree. Files are hashed in parallel by a pool of
+    ``JOBS`` threads.
     """
+    with ThreadPoolExecutor(max_workers=JOBS) as executor:
+        return _write_tree(directory, executor)
+
+
+def _write_tree(directory, executor):
     entries = []
     with os.scandir(directory) as it:
         for entry in it:
-            full_path = os.path.join(directory, entry.name)
-            if is_ignored(full_path):
+            if entry.name == data.DOPPELGIT_DIR:
                 continue
+            full_path = entry.path
             if entry.is_file(follow_symlinks=False):
                 type_ = "blob"
-                with open(full_path, "rb") as f:
-                    oid = data.hash_object(f.read())
+                oid = executor.submit(
+                    data.hash_file_cached, full_path, entry.stat(follow_symlinks=False)
+                )
             elif entry.is_dir(follow_symlinks=False):
                 type_ = "tree"
-                oid = write_tree(full_path)
+                oid = _write_tree(full_path, executor)
             entries.append((entry.name, oid, type_))
 
-    tree_content = "".join(
-        f"{type_} {oid} {name}\n" for name, oid, type_ in sorted(entries)
-    )
-    return data.hash_object(tree_content.encode(), "tree")
+    tree_content = bytearray()
+    for name, oid, type_ in sorted(entries, key=lambda entry: entry[0]):
+        if type_ == "blob":
+            oid = oid.result()
+        tree_content += type_.encode()
+        tree_content += b" "
+        tree_content += oid.encode()
+        tree_content += b" "
+        tree_content += name.encode()
+        tree_content += b"\n"
+    return data.hash_object(bytes(tree_content), "tree")
 
 
 def iterate_tree_entries(oid):
     """Yield each entry of the tree with the given object ID."""
     if not oid:
         return
-    tree_contents = data.get_object(oid, "tree").decode().splitlines()
+    tree_contents = str(data.get_object(oid, "tree"), "utf-8").splitlines()
     for entry in tree_contents:
         entry_type, entry_oid, entry_name = entry.split()
         yield entry_type, entry_oid, entry_name
@@ -83,17 +104,39 @@ def get_working_tree():
     Get the current working directory's tree.
 
     This function returns a dictionary mapping file paths to their object IDs for the current
-    working directory.
+    working directory. Files are hashed in parallel by a pool of ``JOBS`` threads.
+    On Linux they are read in inode order, which keeps disk access mostly sequential.
     """
-    result = {}
-    for root, _, filenames in os.walk("."):
-        for filename in filenames:
-            path = os.path.relpath(os.path.join(root, filename))
-            if is_ignored(path) or not os.path.isfile(path):
+    files = list(_scan_files("."))
+    if sys.platform.startswith("linux"):
+        files.sort(key=lambda file: file[1].inode())
+    with ThreadPoolExecutor(max_workers=JOBS) as executor:
+        return dict(executor.map(_hash_entry, files))
+
+
+def _hash_entry(file):
+    """Return the relative path and blob oid of a scanned file."""
+    path, entry = file
+    return path, data.hash_file_cached(path, entry.stat(follow_symlinks=False))
+
+
+def _scan_files(directory, prefix=""):
+    """
+    Recursively yield (relative path, entry) pairs for the files below a directory.
+
+    The repository directory is pruned without being descended into, and file
+    types come from the cached ``DirEntry`` data instead of extra stat calls.
+    Relative paths are built up while descending rather than derived per file.
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name == data.DOPPELGIT_DIR:
                 continue
-            with open(path, "rb") as f:
-                result[path] = data.hash_object(f.read())
-    return result
+            path = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_files(entry.path, f"{path}/")
+            elif entry.is_file(follow_symlinks=False):
+                yield path, entry
 
 
 def get_index_tree():
@@ -106,6 +149,24 @@ def get_index_tree():
         return index
 
 
+def get_refs_by_oid():
+    """
+    Get the names of the refs pointing at each object ID.
+
+    The mapping is built once and reused until a ref changes, so callers must not
+    modify it.
+    """
+    return _get_refs_by_oid(data.get_refs_version())
+
+
+@lru_cache(maxsize=1)
+def _get_refs_by_oid(refs_version):
+    refs = {}
+    for refname, ref in data.iter_refs().items():
+        refs.setdefault(ref.value, []).append(refname)
+    return refs
+
+
 def get_commit(oid):
     pass
 
@@ -117,10 +178,7 @@ def read_tree(tree_oid):
     This function reads the contents of the specified tree object ID into the current
     working directory, creating directories and files as needed.
     """
-    for path, oid in get_tree(tree_oid, base_path="./").items():
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "wb") as f:
-            f.write(data.get_object(oid))
+    _write_blobs(get_tree(tree_oid, base_path="./").items())
 
 
 def read_tree_merged(t_base, t_head, t_other, update_working=False):
@@ -135,13 +193,29 @@ def read_tree_merged(t_base, t_head, t_other, update_working=False):
 
 def _checkout_index(index):
     _empty_current_directory()
-    for (
-        path,
-        oid,
-    ) in index.items():
-        os.makedirs(os.path.dirname(f"./{path}"), exist_ok=True)
-        with open(path, "wb") as f:
-            f.write(data.get_object(oid, "blob"))
+    _write_blobs((f"./{path}", oid) for path, oid in index.items())
+
+
+def _write_blobs(blobs):
+    """
+    Write (path, oid) blob pairs into the working directory.
+
+    Each parent directory is created once up front, shallowest first, then the
+    blobs are streamed from the object store in parallel by a pool of ``JOBS``
+    threads.
+    """
+    blobs = list(blobs)
+    directories = {os.path.dirname(path) for path, _ in blobs}
+    for directory in sorted(directories, key=lambda d: d.count("/")):
+        os.makedirs(directory, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=JOBS) as executor:
+        list(executor.map(_write_blob, blobs))
+
+
+def _write_blob(blob):
+    path, oid = blob
+    with data.open_object(oid, "blob") as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst, length=data.CHUNK_SIZE)
 
 
 def commit(message):
@@ -160,6 +234,7 @@ def commit(message):
     oid = data.hash_object(commit.encode(), "commit")
 
     data.update_ref("HEAD", data.RefValue(symbolic=False, value=oid))
+    data.write_stat_cache()
 
     return oid
 
@@ -171,20 +246,23 @@ def _empty_current_directory():
     This function removes all files and directories in the current working directory
     except for those that are ignored.
     """
-    for root, dirnames, filenames in os.walk("."):
-        for filename in filenames:
-            path = os.path.relpath(os.path.join(root, filename))
-            if is_ignored(path):
-                continue
-            os.remove(path)
-        for dirname in dirnames:
-            path = os.path.relpath(os.path.join(root, dirname))
-            if is_ignored(path):
+    _empty_directory(".")
+
+
+def _empty_directory(directory):
+    """Remove the contents of a directory bottom-up, skipping the repository."""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name == data.DOPPELGIT_DIR:
                 continue
-            try:
-                os.rmdir(path)
-            except (FileNotFoundError, OSError):
-                pass
+            if entry.is_dir(follow_symlinks=False):
+                _empty_directory(entry.path)
+                try:
+                    os.rmdir(entry.path)
+                except OSError:
+                    pass
+            else:
+                os.remove(entry.path)
 
 
 def is_ignored(path):
@@ -192,10 +270,8 @@ def is_ignored(path):
     Check if a path is ignored.
 
     This function returns True if the specified path should be ignored, otherwise False.
+    Directory walks prune the repository directory by entry name instead, so this is
+    only needed for externally supplied paths.
     """
     return ".doppelgit" in path.split("/")
 
-
-# Example usage
-tree_oid = write_tree((os.getcwd().rsplit("/", 2))[0])
-print(f"Tree object ID for the specified directory: {tree_oid}")
@@ -1,4 +1,5 @@
 import argparse
+import logging
 import os
 import subprocess
 import sys
@@ -13,18 +14,34 @@ CommandArgument = Tuple[str, type, str, Optional[bool], Optional[str]]
 
 
 def main():
+    logging.basicConfig(level=logging.INFO)
     with data.change_git_dir("."):
         args = parse_args()
+        base.JOBS = args.jobs
         args.func(args)
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="A git-like version control system.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=base.JOBS,
+        help="Number of threads used to hash and check out files",
+    )
     commands = parser.add_subparsers(dest="command", required=True)
     add_command_parsers(commands)
     return parser.parse_args()
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 def add_command_parsers(commands: argparse._SubParsersAction) -> None:
     command_definitions = get_command_definitions()
 
@@ -179,8 +196,7 @@ def init(args: argparse.Namespace) -> None:
 
 
 def hash_object(args: argparse.Namespace) -> None:
-    with open(args.file, "rb") as f:
-        print(data.hash_object(f.read()))
+    print(data.hash_object(path=args.file))
 
 
 def cat_file(args: argparse.Namespace) -> None:
@@ -210,10 +226,7 @@ def _print_commit(
 
 
 def log(args: argparse.Namespace) -> None:
-    refs = {}
-    for refname, ref in data.iter_refs():
-        refs.setdefault(ref.value, []).append(refname)
-
+    refs = base.get_refs_by_oid()
     for oid in base.iter_commits_and_parents({args.oid}):
         commit = base.get_commit(oid)
         _print_commit(oid, commit, refs.get(oid))
@@ -227,7 +240,7 @@ def show(args: argparse.Namespace) -> None:
     if commit.parents:
         parent_tree = base.get_commit(commit.parents[0]).tree
 
-    _print_commit(args.oid, commit)
+    _print_commit(args.oid, commit, base.get_refs_by_oid().get(args.oid))
     result = diff.diff_trees(base.get_tree(parent_tree), base.get_tree(commit.tree))
     sys.stdout.flush()
     sys.stdout.buffer.write(result)
@@ -312,15 +325,12 @@ def status(args: argparse.Namespace) -> None:
 
     print("\nChanges to be committed:\n")
     HEAD_tree = HEAD and base.get_commit(HEAD).tree
-    for path, action in diff.iter_changed_files(
-        base.get_tree(HEAD_tree), base.get_index_tree()
-    ):
+    index_tree = base.get_index_tree()
+    for path, action in diff.iter_changed_files(base.get_tree(HEAD_tree), index_tree):
         print(f"{action:>12}: {path}")
 
     print("\nChanges not staged for commit:\n")
-    for path, action in diff.iter_changed_files(
-        base.get_index_tree(), base.get_working_tree()
-    ):
+    for path, action in diff.iter_changed_files(index_tree, base.get_working_tree()):
         print(f"{action:>12}: {path}")
 
 
@@ -1,11 +1,15 @@
 import os
 import hashlib
 import json
+import mmap
 import shutil
+import struct
 import logging
+import tempfile
+import threading
 from collections import namedtuple
 from contextlib import contextmanager
-from typing import Dict, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 # Constants
@@ -15,13 +19,39 @@ INDEX_FILE = "index"
 REFS_DIR = "refs"
 HEAD_FILE = "HEAD"
 MERGE_HEAD_FILE = "MERGE_HEAD"
+STAT_CACHE_FILE = "stat_cache"
+PACKED_REFS_FILE = "packed-refs"
 DOPPELGIT_DIR = ".doppelgit"
+CHUNK_SIZE = 65536
+
+# Binary index layout: magic, version and entry count, then for each entry a
+# path length, the UTF-8 path and the 40 byte hex oid
+INDEX_SIGNATURE = b"DIDX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct(">4sII")
+INDEX_PATH_LEN = struct.Struct(">H")
+OID_HEX_LEN = 40
 
 # Types
 RefValue = namedtuple("RefValue", ["symbolic", "value"])
 
-# Logging configuration
-logging.basicConfig(level=logging.INFO)
+# Blob oids of working tree files keyed by path, loaded on first use, and the
+# entries for the files hashed since then, which replace it when it's saved
+_stat_cache: Optional[Dict[str, list]] = None
+_stat_cache_fresh: Dict[str, list] = {}
+_stat_cache_mtime_ns = 0
+_stat_cache_lock = threading.Lock()
+
+# Resolved refs keyed by (ref, deref) and the ref names found under REFS_DIR,
+# kept for the duration of a command and dropped whenever a ref changes
+_ref_cache: Optional[Dict[Tuple[str, bool], Tuple[str, RefValue]]] = None
+_ref_names: Optional[List[str]] = None
+_packed_refs: Optional[Dict[str, str]] = None
+# Bumped whenever a ref changes, so callers can tell when derived data is stale
+_refs_version = 0
+
+# Logger setup
+logger = logging.getLogger(__name__)
 
 
 # Git Directory Initialization
@@ -32,20 +62,34 @@ def init() -> None:
     ensure_git_dir_set()
     GIT_DIR.mkdir(parents=True, exist_ok=True)
     (GIT_DIR / OBJECTS_DIR).mkdir(exist_ok=True)
-    logging.info(f"Initialized git directory at {GIT_DIR}")
+    logger.info("Initialized git directory at %s", GIT_DIR)
 
 
 # Context Managers
 @contextmanager
-def change_git_dir(new_dir: str) -> None:
+def change_git_dir(new_dir: str) -> Iterator[None]:
     """
-    Change the GIT_DIR.
+    Change the GIT_DIR for the duration of the block, restoring it afterwards.
     """
     global GIT_DIR
     old_dir = GIT_DIR
     GIT_DIR = Path(new_dir) / DOPPELGIT_DIR
-    logging.info(f"Changed GIT_DIR to {GIT_DIR}")
-    return old_dir
+    _reset_caches()
+    logger.info("Changed GIT_DIR to %s", GIT_DIR)
+    try:
+        yield
+    finally:
+        GIT_DIR = old_dir
+        _reset_caches()
+
+
+def _reset_caches() -> None:
+    """
+    Drop the caches read from the git directory, which aren't keyed by GIT_DIR.
+    """
+    global _stat_cache, _stat_cache_fresh, _stat_cache_mtime_ns
+    _stat_cache, _stat_cache_fresh, _stat_cache_mtime_ns = None, {}, 0
+    _invalidate_ref_cache()
 
 
 def get_index() -> Dict[str, str]:
@@ -54,8 +98,8 @@ def get_index() -> Dict[str, str]:
     """
     ensure_git_dir_set()
     index_path = GIT_DIR / INDEX_FILE
-    index = read_json_file(index_path) if index_path.is_file() else {}
-    logging.info(f"Read index from {index_path}")
+    index = read_index_file(index_path) if index_path.is_file() else {}
+    logger.info("Read index from %s", index_path)
     return index
 
 
@@ -65,37 +109,211 @@ def write_index(index: Dict[str, str]) -> None:
     """
     ensure_git_dir_set()
     index_path = GIT_DIR / INDEX_FILE
-    write_json_file(index_path, index)
-    logging.info(f"Updated index at {index_path}")
+    write_index_file(index_path, index)
+    logger.info("Updated index at %s", index_path)
 
 
 # Object Handling
-def hash_object(data: bytes, type_: str = "blob") -> str:
+def hash_object(
+    data: Optional[bytes] = None, type_: str = "blob", *, path: Optional[str] = None
+) -> str:
     """
     Hash the object and store it in the git directory.
+
+    Either the raw ``data`` or the ``path`` of a file to read it from must be
+    given. Files are streamed in chunks so large blobs are never held in memory.
     """
     ensure_git_dir_set()
-    object_data = type_.encode() + b"\x00" + data
+    if path is None:
+        if data is None:
+            raise ValueError("Either data or path must be given")
+        oid = _store_object(type_.encode() + b"\x00" + data)
+    else:
+        oid = _hash_file(path, type_)
+    logger.debug("Stored object %s", oid)
+    return oid
+
+
+def _store_object(object_data: bytes) -> str:
+    """
+    Hash serialized object data in one call, writing it only if it isn't stored yet.
+    """
     oid = hashlib.sha1(object_data).hexdigest()
-    write_to_file(GIT_DIR / OBJECTS_DIR / oid, object_data, mode="wb")
-    logging.info(f"Stored object {oid}")
+    if not (GIT_DIR / OBJECTS_DIR / oid).is_file():
+
+        def write(out: BinaryIO) -> str:
+            out.write(object_data)
+            return oid
+
+        _write_object(write)
     return oid
 
 
-def get_object(oid: str, expected: Optional[str] = "blob") -> bytes:
+def _hash_file(path: str, type_: str) -> str:
+    """
+    Stream a file into the object store, hashing it as it is copied.
+
+    Files no larger than a single chunk are read whole and hashed in one call.
+    """
+    header = type_.encode() + b"\x00"
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= CHUNK_SIZE:
+            return _store_object(header + f.read())
+        return _stream_file(f, header)
+
+
+def _stream_file(f: BinaryIO, header: bytes) -> str:
+    """
+    Copy an open file into the object store in chunks, hashing it on the way.
+    """
+
+    def write(out: BinaryIO) -> str:
+        hasher = hashlib.sha1()
+        hasher.update(header)
+        out.write(header)
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            out.write(chunk)
+        return hasher.hexdigest()
+
+    return _write_object(write)
+
+
+def _write_object(write: Callable[[BinaryIO], str]) -> str:
+    """
+    Write an object to a temporary file and move it into place atomically.
+
+    ``write`` receives the temporary file and returns the oid to store it under,
+    so an interrupted write never leaves a partial object behind.
+    """
+    objects_dir = GIT_DIR / OBJECTS_DIR
+    fd, tmp_path = tempfile.mkstemp(dir=objects_dir, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            oid = write(out)
+        os.replace(tmp_path, objects_dir / oid)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return oid
+
+
+def hash_file_cached(path: str, stat: Optional[os.stat_result] = None) -> str:
+    """
+    Hash a working tree file, reusing the stored oid if its stat data is unchanged.
+
+    Entries are keyed by path and hold ``st_mtime_ns``, ``st_ctime_ns``,
+    ``st_size``, ``st_mode`` and ``st_ino`` along with the oid; any difference in
+    those values rehashes the file. As in git, an entry whose mtime isn't older
+    than the cache file itself is racy, since the file could have changed again
+    within the same timestamp tick, so it is rehashed too.
+    """
+    cache = _load_stat_cache()
+    if stat is None:
+        stat = os.stat(path, follow_symlinks=False)
+    key = os.path.normpath(path)
+    stamp = [
+        stat.st_mtime_ns,
+        stat.st_ctime_ns,
+        stat.st_size,
+        stat.st_mode,
+        stat.st_ino,
+    ]
+
+    cached = cache.get(key)
+    if (
+        cached is None
+        or cached[:5] != stamp
+        or stat.st_mtime_ns >= _stat_cache_mtime_ns
+    ):
+        cached = stamp + [hash_object(path=path)]
+    _stat_cache_fresh[key] = cached
+    return cached[5]
+
+
+def write_stat_cache() -> None:
+    """
+    Persist the entries of the files hashed since the stat cache was loaded.
+
+    Entries for paths that weren't visited, such as deleted or renamed files, are
+    dropped. Nothing is written if no files were hashed or the cache is unchanged.
+    """
+    global _stat_cache, _stat_cache_fresh
+    ensure_git_dir_set()
+    if not _stat_cache_fresh or _stat_cache_fresh == _stat_cache:
+        return
+    write_to_file(
+        GIT_DIR / STAT_CACHE_FILE, json.dumps(_stat_cache_fresh, separators=(",", ":"))
+    )
+    _stat_cache, _stat_cache_fresh = _stat_cache_fresh, {}
+    logger.info("Updated stat cache at %s", GIT_DIR / STAT_CACHE_FILE)
+
+
+def _load_stat_cache() -> Dict[str, list]:
+    """
+    Load the stat cache from the git directory on first use.
+    """
+    global _stat_cache, _stat_cache_mtime_ns
+    if _stat_cache is not None:
+        return _stat_cache
+    ensure_git_dir_set()
+    with _stat_cache_lock:
+        if _stat_cache is None:
+            cache_path = GIT_DIR / STAT_CACHE_FILE
+            try:
+                _stat_cache_mtime_ns = cache_path.stat().st_mtime_ns
+                _stat_cache = read_json_file(cache_path)
+            except (OSError, ValueError):
+                _stat_cache_mtime_ns = 0
+                _stat_cache = {}
+    return _stat_cache
+
+
+def get_object(oid: str, expected: Optional[str] = "blob") -> memoryview:
     """
     Get the object content by its oid.
+
+    The content is a read-only view of the memory mapped object file, so no copy
+    is made; the mapping is released once the view is no longer referenced.
     """
     ensure_git_dir_set()
     object_path = GIT_DIR / OBJECTS_DIR / oid
-    object_data = read_binary_file(object_path)
+    with open(object_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    type_, _, content = object_data.partition(b"\x00")
-    type_ = type_.decode()
+    header_end = mm.find(b"\x00")
+    assert header_end != -1, f"Object {oid} has no type header"
+    type_ = mm[:header_end].decode()
 
     if expected is not None:
         assert type_ == expected, f"Expected {expected} but got {type_}"
-    return content
+    return memoryview(mm)[header_end + 1 :]
+
+
+def open_object(oid: str, expected: Optional[str] = "blob") -> BinaryIO:
+    """
+    Open the object by its oid, positioned at the start of its content.
+
+    The caller is responsible for closing the returned file, which lets large
+    objects be streamed instead of read into memory by ``get_object``.
+    """
+    ensure_git_dir_set()
+    f = open(GIT_DIR / OBJECTS_DIR / oid, "rb")
+    try:
+        header = f.read(64)
+        type_, sep, _ = header.partition(b"\x00")
+        assert sep, f"Object {oid} has no type header"
+        type_ = type_.decode()
+        if expected is not None:
+            assert type_ == expected, f"Expected {expected} but got {type_}"
+        f.seek(len(type_) + 1)
+    except BaseException:
+        f.close()
+        raise
+    return f
 
 
 def object_exists(oid: str) -> bool:
@@ -115,7 +333,7 @@ def fetch_objects_if_missing(oid: str, remote_git_dir: str) -> None:
         return
     remote_git_dir = Path(remote_git_dir) / DOPPELGIT_DIR
     shutil.copy(remote_git_dir / OBJECTS_DIR / oid, GIT_DIR / OBJECTS_DIR / oid)
-    logging.info(f"Fetched object {oid} from remote {remote_git_dir}")
+    logger.debug("Fetched object %s from remote %s", oid, remote_git_dir)
 
 
 def push_object(oid: str, remote_git_dir: str) -> None:
@@ -125,7 +343,7 @@ def push_object(oid: str, remote_git_dir: str) -> None:
     ensure_git_dir_set()
     remote_git_dir = Path(remote_git_dir) / DOPPELGIT_DIR
     shutil.copy(GIT_DIR / OBJECTS_DIR / oid, remote_git_dir / OBJECTS_DIR / oid)
-    logging.info(f"Pushed object {oid} to remote {remote_git_dir}")
+    logger.debug("Pushed object %s to remote %s", oid, remote_git_dir)
 
 
 # Reference Handling
@@ -136,7 +354,33 @@ def update_ref(ref: str, value: str, deref: bool = True) -> None:
     ensure_git_dir_set()
     ref_path = GIT_DIR / ref
     write_to_file(ref_path, value)
-    logging.info(f"Updated ref {ref} with value {value}")
+    _invalidate_ref_cache()
+    logger.debug("Updated ref %s with value %s", ref, value)
+
+
+def update_refs_batch(refs: Dict[str, RefValue]) -> None:
+    """
+    Update several direct references at once by writing them to packed-refs.
+
+    The packed-refs file is replaced atomically in a single write. Only once it is
+    in place are the loose ref files for the updated refs removed, since a loose
+    ref would take precedence.
+    """
+    ensure_git_dir_set()
+    packed = dict(_load_packed_refs())
+    for ref, value in refs.items():
+        assert not value.symbolic, f"Can't pack symbolic ref {ref}"
+        packed[ref] = value.value
+    _write_packed_refs(packed)
+    try:
+        for ref in refs:
+            try:
+                os.remove(GIT_DIR / ref)
+            except FileNotFoundError:
+                pass
+    finally:
+        _invalidate_ref_cache()
+    logger.debug("Updated %d packed refs", len(refs))
 
 
 def get_ref(ref: str, deref: bool = True) -> RefValue:
@@ -150,31 +394,48 @@ def _get_ref_internal(ref: str, deref: bool) -> Tuple[str, RefValue]:
     """
     Internal function to get the reference value.
     """
+    global _ref_cache
     ensure_git_dir_set()
+    if _ref_cache is None:
+        _ref_cache = {}
+    cached = _ref_cache.get((ref, deref))
+    if cached is not None:
+        return cached
+
     ref_path = GIT_DIR / ref
-    value = read_from_file(ref_path).strip() if ref_path.is_file() else None
+    if ref_path.is_file():
+        value = read_from_file(ref_path).strip()
+    else:
+        value = _load_packed_refs().get(ref)
 
     symbolic = bool(value) and value.startswith("ref:")
     if symbolic:
         value = value.split(":", 1)[1].strip()
-        if deref:
-            return _get_ref_internal(value, deref=True)
+    if symbolic and deref:
+        result = _get_ref_internal(value, deref=True)
+    else:
+        result = ref, RefValue(symbolic=symbolic, value=value)
 
-    return ref, RefValue(symbolic=symbolic, value=value)
+    _ref_cache[ref, deref] = result
+    return result
 
 
 def iter_refs(prefix: str = "", deref: bool = True) -> Dict[str, RefValue]:
     """
     Iterate over references with a given prefix.
     """
+    global _ref_names
     ensure_git_dir_set()
-    refs = [HEAD_FILE, MERGE_HEAD_FILE]
-    for root, _, filenames in os.walk(GIT_DIR / REFS_DIR):
-        root = Path(root).relative_to(GIT_DIR)
-        refs.extend(f"{root}/{name}" for name in filenames)
+    if _ref_names is None:
+        _ref_names = [HEAD_FILE, MERGE_HEAD_FILE]
+        refs_dir = GIT_DIR / REFS_DIR
+        if refs_dir.is_dir():
+            _ref_names.extend(_walk_refs(str(refs_dir), REFS_DIR))
+        loose = set(_ref_names)
+        _ref_names.extend(name for name in _load_packed_refs() if name not in loose)
 
     ref_dict = {}
-    for refname in refs:
+    for refname in _ref_names:
         if not refname.startswith(prefix):
             continue
         ref = get_ref(refname, deref=deref)
@@ -184,14 +445,74 @@ def iter_refs(prefix: str = "", deref: bool = True) -> Dict[str, RefValue]:
     return ref_dict
 
 
+def _walk_refs(directory: str, rel: str) -> Iterator[str]:
+    """
+    Recursively yield the names of the refs stored below a directory.
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = f"{rel}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_refs(entry.path, name)
+            else:
+                yield name
+
+
 def delete_ref(ref: str, deref: bool = True) -> None:
     """
     Delete the reference.
     """
     ensure_git_dir_set()
     ref, _ = _get_ref_internal(ref, deref=False)
-    os.remove(GIT_DIR / ref)
-    logging.info(f"Deleted ref {ref}")
+    packed = _load_packed_refs()
+    if ref in packed:
+        _write_packed_refs({name: oid for name, oid in packed.items() if name != ref})
+    if (GIT_DIR / ref).is_file() or ref not in packed:
+        os.remove(GIT_DIR / ref)
+    _invalidate_ref_cache()
+    logger.debug("Deleted ref %s", ref)
+
+
+def _invalidate_ref_cache() -> None:
+    """
+    Drop all cached refs so the next lookup reads them from disk.
+    """
+    global _ref_cache, _ref_names, _packed_refs, _refs_version
+    _ref_cache = None
+    _ref_names = None
+    _packed_refs = None
+    _refs_version += 1
+
+
+def get_refs_version() -> int:
+    """
+    Get a counter that changes whenever any reference is updated or deleted.
+    """
+    return _refs_version
+
+
+def _load_packed_refs() -> Dict[str, str]:
+    """
+    Load the packed refs, one "oid refname" pair per line, on first use.
+    """
+    global _packed_refs
+    if _packed_refs is None:
+        packed_path = GIT_DIR / PACKED_REFS_FILE
+        _packed_refs = {}
+        if packed_path.is_file():
+            for line in read_from_file(packed_path).splitlines():
+                if line:
+                    oid, ref = line.split(" ", 1)
+                    _packed_refs[ref] = oid
+    return _packed_refs
+
+
+def _write_packed_refs(packed: Dict[str, str]) -> None:
+    """
+    Atomically replace the packed-refs file.
+    """
+    content = "".join(f"{oid} {ref}\n" for ref, oid in sorted(packed.items()))
+    write_file_atomically(GIT_DIR / PACKED_REFS_FILE, content.encode())
 
 
 # Helper Functions
@@ -219,6 +540,23 @@ def write_to_file(path: Path, content: str, mode: str = "w") -> None:
         f.write(content)
 
 
+def write_file_atomically(path: Path, content: bytes) -> None:
+    """
+    Write binary data to a temporary file and move it over the given path.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
 def read_binary_file(path: Path) -> bytes:
     """
     Read binary data from a file.
@@ -235,6 +573,64 @@ def read_json_file(path: Path) -> Dict:
         return json.load(f)
 
 
+def read_index_file(path: Path) -> Dict[str, str]:
+    """
+    Read an index file, falling back to the legacy JSON format.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < INDEX_HEADER.size:
+            return read_json_file(path) if f.read().strip() else {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[: len(INDEX_SIGNATURE)] != INDEX_SIGNATURE:
+                return read_json_file(path)
+            return _unpack_index(memoryview(mm))
+
+
+def _unpack_index(buf: memoryview) -> Dict[str, str]:
+    """
+    Decode the entries of a binary index.
+    """
+    try:
+        _, version, count = INDEX_HEADER.unpack_from(buf)
+        if version != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {version}")
+
+        index = {}
+        offset = INDEX_HEADER.size
+        for _ in range(count):
+            if offset + INDEX_PATH_LEN.size > len(buf):
+                raise ValueError("Index is truncated")
+            (path_len,) = INDEX_PATH_LEN.unpack_from(buf, offset)
+            offset += INDEX_PATH_LEN.size
+            if offset + path_len + OID_HEX_LEN > len(buf):
+                raise ValueError("Index is truncated")
+            path = str(buf[offset : offset + path_len], "utf-8")
+            offset += path_len
+            index[path] = str(buf[offset : offset + OID_HEX_LEN], "ascii")
+            offset += OID_HEX_LEN
+        if offset != len(buf):
+            raise ValueError("Index has trailing data")
+        return index
+    finally:
+        buf.release()
+
+
+def write_index_file(path: Path, index: Dict[str, str]) -> None:
+    """
+    Write an index file in the binary format with a single atomic write.
+    """
+    content = bytearray(INDEX_HEADER.pack(INDEX_SIGNATURE, INDEX_VERSION, len(index)))
+    for entry_path, oid in index.items():
+        assert (
+            len(oid) == OID_HEX_LEN and oid.isascii()
+        ), f"Invalid oid {oid!r} for {entry_path}"
+        encoded = entry_path.encode()
+        content += INDEX_PATH_LEN.pack(len(encoded))
+        content += encoded
+        content += oid.encode("ascii")
+    write_file_atomically(path, content)
+
+
 def write_json_file(path: Path, content: Dict) -> None:
     """
     Write JSON data to a file.
@@ -1,12 +1,14 @@
 import os
 import logging
-from typing import Dict, Set, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Set, Optional
 
 from . import base, data
 
 # Constants
 REMOTE_REFS_BASE = "refs/heads/"
 LOCAL_REFS_BASE = "refs/remote/"
+MAX_TRANSFER_WORKERS = 16
 
 # Logger setup
 logger = logging.getLogger(__name__)
@@ -24,13 +26,18 @@ def fetch(remote_path: str) -> None:
 
         refs = _get_remote_refs(remote_path, REMOTE_REFS_BASE)
 
-        for oid in base.iter_objects_in_commits(refs.values()):
-            data.fetch_object_if_missing(oid, remote_path)
+        # Walk the objects where they exist; the walk reads each commit and tree
+        # to find its children, and new ones aren't local until they are copied
+        with data.change_git_dir(remote_path):
+            oids = list(base.iter_objects_in_commits(refs.values()))
+        _transfer_objects(data.fetch_objects_if_missing, oids, remote_path)
 
+        local_refs = {}
         for remote_name, value in refs.items():
             refname = os.path.relpath(remote_name, REMOTE_REFS_BASE)
             local_ref_path = os.path.join(LOCAL_REFS_BASE, refname)
-            data.update_ref(local_ref_path, data.RefValue(symbolic=False, value=value))
+            local_refs[local_ref_path] = data.RefValue(symbolic=False, value=value)
+        data.update_refs_batch(local_refs)
 
         logger.info("Fetch operation completed successfully.")
 
@@ -67,8 +74,7 @@ def push(remote_path: str, refname: str) -> None:
         local_objects = set(base.iter_objects_in_commits({local_ref}))
         objects_to_push = local_objects - remote_objects
 
-        for oid in objects_to_push:
-            data.push_object(oid, remote_path)
+        _transfer_objects(data.push_object, objects_to_push, remote_path)
 
         with data.change_git_dir(remote_path):
             data.update_ref(refname, data.RefValue(symbolic=False, value=local_ref))
@@ -80,6 +86,34 @@ def push(remote_path: str, refname: str) -> None:
         raise
 
 
+def _transfer_objects(
+    transfer: Callable[[str, str], None], oids: Iterable[str], remote_path: str
+) -> None:
+    """
+    Copies objects to or from the remote repository concurrently.
+
+    Args:
+        transfer: Function copying a single object, called as transfer(oid, remote_path).
+        oids: Object IDs to copy.
+        remote_path: Path to the remote repository.
+
+    Raises:
+        RuntimeError: If any of the copies failed, listing every failed object.
+    """
+    errors = []
+    with ThreadPoolExecutor(max_workers=MAX_TRANSFER_WORKERS) as executor:
+        futures = {executor.submit(transfer, oid, remote_path): oid for oid in oids}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                errors.append(f"{futures[future]}: {error}")
+
+    if errors:
+        raise RuntimeError(
+            f"Failed to transfer {len(errors)} object(s): {'; '.join(errors)}"
+        )
+
+
 def _get_remote_refs(remote_path: str, prefix: str = "") -> Dict[str, Optional[str]]:
     """
     Retrieves remote references from the remote repository.